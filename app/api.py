@@ -1,17 +1,28 @@
 # app/api.py
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 
-from fastapi import FastAPI, Request, Query, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel, Field
 
 # ----------------------------
 # Imports from your project
 # ----------------------------
 # Loaders (your load_data.py may have different function names)
+from app.load_data import find_versions
+
 try:
     from app.load_data import load_cpt, load_icd10
 except ImportError:
@@ -25,21 +36,47 @@ except ImportError:
         ) from e
 
 # Quiz builder
-from app.quiz import build_quiz
+from app.quiz import DIFFICULTIES, build_quiz, prepare_quiz_pool, weak_positions
+from app.smart_gen import generate_exam
 
-# Search (free search)
-try:
-    from app.search import free_search
-except ImportError as e:
-    raise ImportError(
-        "Could not import free_search. Make sure app/search.py defines free_search(df, q, limit, kind)."
-    ) from e
+# Code-set hierarchy (browse)
+from app.browse import ROOT, browse, build_cpt_hierarchy, build_icd_hierarchy
+
+# Fast JSON responses (orjson / pre-encoded fragments)
+from app.responses import FastJSONResponse, dumps, raw_json_response
+
+# Search (free search, served as pre-encoded JSON)
+from app.search import join_json
+
+# Yearly code-set versions (deltas against the current files)
+from app.versions import build_versioned
+
+# Query log + cache warming (opt-in via TARMEEZ_QUERY_LOG)
+from app import querylog
+
+# Quiz attempt history (SQLite, batched background writes)
+from app import attempts
 
 
 # ----------------------------
 # App setup
 # ----------------------------
-app = FastAPI(title="Tarmeez", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # replay popular queries in the background so a restart/reload isn't cold
+    if QUERY_LOG is not None:
+        QUERY_LOG.start()
+        querylog.warm_in_background(QUERY_LOG, lambda kind, q: _cached_search(kind, q, 10, None), ["cpt", "icd"])
+    if ATTEMPTS is not None:
+        ATTEMPTS.start()
+    yield
+    if QUERY_LOG is not None:
+        QUERY_LOG.stop()
+    if ATTEMPTS is not None:
+        ATTEMPTS.stop()
+
+
+app = FastAPI(title="Tarmeez", version="0.1.0", lifespan=lifespan)
 
 BASE_DIR = Path(__file__).resolve().parent  # .../app
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -64,6 +101,28 @@ except Exception as e:
     ICD_DF = None
     print("[ICD] load failed:", e)
 
+# other releases (data/cpt_2024.csv, data/icd10_2023.csv ...) kept as deltas
+CODE_SETS = {
+    "cpt": build_versioned(CPT_DF, "cpt", find_versions("cpt"), load_cpt),
+    "icd": build_versioned(ICD_DF, "icd", find_versions("icd"), load_icd10),
+}
+
+# quiz pools: filtered rows + precomputed difficulty column/indexes
+QUIZ_POOLS = {
+    "cpt": None if CPT_DF is None else prepare_quiz_pool(CPT_DF, "cpt"),
+    "icd": None if ICD_DF is None else prepare_quiz_pool(ICD_DF, "icd"),
+}
+
+# browse hierarchy: chapter/section -> category/range -> codes
+HIERARCHY = {
+    "cpt": build_cpt_hierarchy(CPT_DF),
+    "icd": build_icd_hierarchy(ICD_DF),
+}
+
+
+QUERY_LOG = querylog.from_env()
+ATTEMPTS = attempts.from_env()
+
 
 # ----------------------------
 # Helpers
@@ -81,6 +140,42 @@ def _get_df(kind: str):
     raise HTTPException(status_code=400, detail="kind must be 'cpt' or 'icd' (or 'icd10')")
 
 
+def _get_code_set(kind: str, version: str | None = None):
+    codes = CODE_SETS.get(kind)
+    if codes is None:
+        raise HTTPException(status_code=500, detail=f"{kind.upper()} data not loaded")
+    if not codes.has(version):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown {kind} version '{version}'. Available: {', '.join(codes.versions())}",
+        )
+    return codes
+
+
+# max results per search (HTTP and WebSocket); keeps cached result strings small
+SEARCH_LIMIT_MAX = 100
+
+
+@lru_cache(maxsize=int(os.environ.get("TARMEEZ_SEARCH_CACHE", "1024")))
+def _cached_search(kind: str, qn: str, limit: int, version: str | None) -> str:
+    codes = CODE_SETS.get(kind)
+    if codes is None:
+        return "[]"
+    return join_json(codes.search_json(qn, limit=limit, version=version))
+
+
+def _search(kind: str, q: str, limit: int, version: str | None = None) -> str:
+    """
+    Version-aware free_search with an LRU result cache.
+    Returns the results array as encoded JSON (built from precomputed per-record fragments).
+    The key uses the same normalization as free_search (strip + lower).
+    """
+    _get_code_set(kind, version)
+    if QUERY_LOG is not None:
+        QUERY_LOG.record(kind, q)
+    return _cached_search(kind, (q or "").strip().lower(), limit, version or None)
+
+
 # ----------------------------
 # Basic status
 # ----------------------------
@@ -219,24 +314,262 @@ def cases_mixed(request: Request):
 
 # Quiz JSON API (keep this as the correct API)
 @app.get("/api/quiz/{kind}")
-def api_quiz(kind: str, n: int = 10):
+def api_quiz(
+    kind: str,
+    n: int = 10,
+    difficulty: str | None = None,
+    user_id: str | None = None,
+    weak_share: float = Query(0.3, ge=0.0, le=1.0),
+):
     df, k = _get_df(kind)
-    return build_quiz(df, k, n=n)
+    if difficulty is not None:
+        difficulty = difficulty.lower()
+        if difficulty not in DIFFICULTIES:
+            raise HTTPException(status_code=400, detail="difficulty must be 'easy', 'medium' or 'hard'")
+
+    # part of the quiz from the user's weak codes / areas (indexed lookups)
+    prefer = None
+    pool = QUIZ_POOLS[k]
+    if user_id and ATTEMPTS is not None and pool is not None and weak_share > 0:
+        # optional extra: a database problem must not break the quiz itself
+        try:
+            prefer = weak_positions(pool, ATTEMPTS.weak_codes(user_id, k), ATTEMPTS.weak_prefixes(user_id, k))
+        except sqlite3.Error as e:
+            print("[attempts] weak-area read failed:", e)
+
+    return FastJSONResponse(
+        build_quiz(df, k, n=n, difficulty=difficulty, pool=pool, prefer=prefer, prefer_share=weak_share)
+    )
+
+
+class QuizAnswer(BaseModel):
+    code: str = Field(..., max_length=20)
+    chosen: str = Field("", max_length=20)
+
+
+class QuizAttempt(BaseModel):
+    user_id: str = Field(..., min_length=1, max_length=64)
+    kind: str
+    answers: list[QuizAnswer] = Field(..., max_length=200)
+
+
+def _get_attempts():
+    if ATTEMPTS is None:
+        raise HTTPException(status_code=503, detail="Attempt storage is disabled")
+    return ATTEMPTS
+
+
+# Record graded quiz answers (queued; written in batches in the background)
+@app.post("/api/attempts", status_code=202)
+def record_attempts(attempt: QuizAttempt):
+    store = _get_attempts()
+    _df, k = _get_df(attempt.kind)
+    queued = store.record(attempt.user_id, k, (a.model_dump() for a in attempt.answers))
+    if queued < sum(1 for a in attempt.answers if a.code.strip()):
+        raise HTTPException(status_code=503, detail=f"Attempt queue is full; {queued} answers saved")
+    return {"queued": queued}
+
+
+@app.get("/api/attempts/{user_id}")
+def attempts_summary(user_id: str):
+    return _get_attempts().summary(user_id)
+
+
+# Bulk practice exam (NDJSON stream, one question per line)
+@app.get("/api/exam/{kind}")
+def api_exam(
+    kind: str,
+    n: int = Query(500, ge=1, le=5000),
+    lang: str = "en",
+    difficulty: str = "easy",
+    case: bool = False,
+    seed: int | None = None,
+):
+    df, k = _get_df(kind)
+    lang = lang.lower()
+    if lang not in ("en", "ar"):
+        raise HTTPException(status_code=400, detail="lang must be 'en' or 'ar'")
+    difficulty = difficulty.lower()
+    if difficulty not in DIFFICULTIES:
+        raise HTTPException(status_code=400, detail="difficulty must be 'easy', 'medium' or 'hard'")
+
+    batches = generate_exam(
+        df,
+        n_questions=n,
+        lang=lang,
+        difficulty=difficulty,
+        code_type=("icd10" if k == "icd" else "cpt"),
+        case=case,
+        seed=seed,
+    )
+    # build the first batch before the 200 goes out, so an unusable pool is an error, not an empty stream
+    first = next(batches, None)
+    if first is None:
+        raise HTTPException(status_code=500, detail=f"Not enough usable {k.upper()} codes to build an exam")
+
+    def _ndjson():
+        for batch in itertools.chain([first], batches):
+            yield b"".join(dumps(q) + b"\n" for q in batch)
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
 
 
 # Simple search endpoints (optional aliases)
 @app.get("/search/cpt")
-def search_cpt(q: str = Query(..., min_length=1), limit: int = 10):
-    if CPT_DF is None:
-        raise HTTPException(status_code=500, detail="CPT data not loaded")
-    return {"query": q, "results": free_search(CPT_DF, q, limit=limit, kind="cpt")}
+def search_cpt(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=SEARCH_LIMIT_MAX),
+    version: str | None = None,
+):
+    results = _search("cpt", q, limit, version)
+    return raw_json_response('{"query":' + dumps(q).decode("utf-8") + ',"results":' + results + "}")
 
 
 @app.get("/search/icd")
-def search_icd(q: str = Query(..., min_length=1), limit: int = 10):
-    if ICD_DF is None:
-        raise HTTPException(status_code=500, detail="ICD data not loaded")
-    return {"query": q, "results": free_search(ICD_DF, q, limit=limit, kind="icd")}
+def search_icd(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=SEARCH_LIMIT_MAX),
+    version: str | None = None,
+):
+    results = _search("icd", q, limit, version)
+    return raw_json_response('{"query":' + dumps(q).decode("utf-8") + ',"results":' + results + "}")
+
+
+# Search-as-you-type over one WebSocket per page.
+# Client sends {"kind","q","limit","version","seq"} on every keystroke; the
+# server waits for a pause in typing, runs only the newest query and drops
+# results that were overtaken while they were being computed.
+WS_DEBOUNCE = float(os.environ.get("TARMEEZ_WS_DEBOUNCE", "0.15"))
+
+
+def _ws_query(msg: dict):
+    """
+    Validate one search-as-you-type message -> (kind, q, limit, version).
+    Raises ValueError with a client-facing message.
+    """
+    kind, q, version = msg.get("kind"), msg.get("q"), msg.get("version")
+    for name, v in (("kind", kind), ("q", q), ("version", version)):
+        if v is not None and not isinstance(v, str):
+            raise ValueError(f"{name} must be a string")
+    kind = "icd" if (kind or "").lower() in ("icd", "icd10") else "cpt"
+    try:
+        limit = max(1, min(SEARCH_LIMIT_MAX, int(msg.get("limit") or 10)))
+    except (TypeError, ValueError):
+        limit = 10
+    return kind, (q or "").strip(), limit, version or None
+
+
+def _ws_task_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print("[ws] search worker failed:", repr(task.exception()))
+
+
+@app.websocket("/ws/search")
+async def ws_search(ws: WebSocket):
+    await ws.accept()
+    latest: dict = {}
+    changed = asyncio.Event()
+
+    async def worker():
+        while True:
+            await changed.wait()
+            # debounce: wait until no new message arrived for WS_DEBOUNCE
+            while True:
+                changed.clear()
+                try:
+                    await asyncio.wait_for(changed.wait(), WS_DEBOUNCE)
+                except asyncio.TimeoutError:
+                    break
+            msg = latest.copy()
+            seq = msg.get("seq")
+            if seq is not None and not isinstance(seq, (int, float, str)):
+                seq = None
+
+            # one bad message must not stop the loop (the socket would stay open but silent)
+            q = None
+            try:
+                kind, q, limit, version = _ws_query(msg)
+                if len(q) < 2:
+                    results = "[]"
+                else:
+                    results = await run_in_threadpool(_search, kind, q, limit, version)
+            except HTTPException as e:
+                await ws.send_text(dumps({"seq": seq, "query": q, "error": e.detail}).decode("utf-8"))
+                continue
+            except ValueError as e:
+                await ws.send_text(dumps({"seq": seq, "query": q, "error": str(e)}).decode("utf-8"))
+                continue
+            except Exception as e:
+                print("[ws] search failed:", repr(e))
+                await ws.send_text(dumps({"seq": seq, "query": q, "error": "search failed"}).decode("utf-8"))
+                continue
+
+            # superseded while searching -> skip, the newer query is coming
+            if changed.is_set():
+                continue
+            await ws.send_text('{"seq":' + dumps(seq).decode("utf-8") + ',"query":' + dumps(q).decode("utf-8")
+                               + ',"results":' + results + "}")
+
+    task = asyncio.create_task(worker())
+    task.add_done_callback(_ws_task_done)
+    try:
+        while not task.done():
+            frame = await ws.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            # binary frames / malformed JSON are skipped like any bad message
+            text = frame.get("text")
+            if text is None:
+                continue
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(msg, dict):
+                latest.clear()
+                latest.update(msg)
+                changed.set()
+        # worker died (already logged) -> close so the client falls back to fetch
+        await ws.close(code=1011)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        task.cancel()
+
+
+# Code-set versions and single-code lookup
+@app.get("/versions/{kind}")
+def list_versions(kind: str):
+    _df, k = _get_df(kind)
+    codes = _get_code_set(k)
+    return {"kind": k, "versions": codes.versions(), "deltas": codes.summary()}
+
+
+@app.get("/lookup/{kind}/{code}")
+def lookup_code(kind: str, code: str, version: str | None = None):
+    _df, k = _get_df(kind)
+    found = _get_code_set(k, version).lookup(code, version)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"{code} not found in {k} {version or 'current'}")
+    return found
+
+
+# Browse code sets (children of a node, cursor-paginated)
+@app.get("/browse/{kind}")
+@app.get("/browse/{kind}/{node}")
+def browse_codes(
+    kind: str,
+    node: str = ROOT,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    _df, k = _get_df(kind)
+    try:
+        return browse(HIERARCHY[k], node, cursor=cursor, limit=limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown {k} node: {node}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # (Optional) Legacy quiz JSON endpoint:
@@ -245,7 +578,7 @@ def search_icd(q: str = Query(..., min_length=1), limit: int = 10):
 @app.get("/quiz_api/{kind}")
 def legacy_quiz_api(kind: str, n: int = 10):
     df, k = _get_df(kind)
-    return build_quiz(df, k, n=n)
+    return FastJSONResponse(build_quiz(df, k, n=n, pool=QUIZ_POOLS[k]))
 
 @app.get("/about", response_class=HTMLResponse)
 def about_page(request: Request):
@@ -0,0 +1,251 @@
+# app/attempts.py
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.load_data import DATA_DIR
+
+
+# ----------------------------
+# Settings (env)
+# ----------------------------
+# TARMEEZ_ATTEMPTS_DB     sqlite file (default data/attempts.db); "0" -> disabled
+# TARMEEZ_ATTEMPTS_BATCH  max answers per write transaction (default 500)
+# TARMEEZ_ATTEMPTS_FLUSH  max seconds an answer waits in the queue (default 1)
+# TARMEEZ_ATTEMPTS_QUEUE  max answers waiting for the writer (default 10000)
+DEFAULT_DB_FILE = DATA_DIR / "attempts.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id       INTEGER PRIMARY KEY,
+    user_id  TEXT    NOT NULL,
+    kind     TEXT    NOT NULL,
+    code     TEXT    NOT NULL,
+    chosen   TEXT    NOT NULL,
+    correct  INTEGER NOT NULL,
+    ts       REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_user ON attempts (user_id, kind, ts);
+
+-- per-user weak spots: +1 on a miss, -1 on a correct answer (never below 0)
+CREATE TABLE IF NOT EXISTS missed_codes (
+    user_id  TEXT    NOT NULL,
+    kind     TEXT    NOT NULL,
+    code     TEXT    NOT NULL,
+    misses   INTEGER NOT NULL,
+    last_ts  REAL    NOT NULL,
+    PRIMARY KEY (user_id, kind, code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS missed_codes_rank ON missed_codes (user_id, kind, misses DESC);
+
+CREATE TABLE IF NOT EXISTS missed_prefixes (
+    user_id  TEXT    NOT NULL,
+    kind     TEXT    NOT NULL,
+    prefix   TEXT    NOT NULL,
+    misses   INTEGER NOT NULL,
+    last_ts  REAL    NOT NULL,
+    PRIMARY KEY (user_id, kind, prefix)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS missed_prefixes_rank ON missed_prefixes (user_id, kind, misses DESC);
+"""
+
+# more misses than correct answers in a batch -> insert or add
+_UPSERT = """
+INSERT INTO {table} (user_id, kind, {col}, misses, last_ts) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, kind, {col}) DO UPDATE SET
+    misses = misses + excluded.misses,
+    last_ts = excluded.last_ts
+"""
+# more correct answers -> only lower an existing row
+_LOWER = """
+UPDATE {table} SET misses = MAX(0, misses + ?), last_ts = ?
+WHERE user_id = ? AND kind = ? AND {col} = ?
+"""
+
+
+def code_prefix(kind: str, code: str) -> str:
+    """
+    Area a code belongs to: CPT 100-code range (992), ICD 3-character category (E11).
+    """
+    code = (code or "").strip().upper()
+    if kind == "icd":
+        return code.replace(".", "")[:3]
+    return code[:3]
+
+
+class AttemptStore:
+    """
+    SQLite (WAL) store for quiz answers.
+
+    record() only puts answers on an in-memory queue; one background thread
+    drains it and writes whole batches in a single transaction, so request
+    handlers never wait on disk. Reads use their own per-thread connections,
+    which WAL lets run next to the writer. The queue is bounded: if the
+    writer is not running or falls behind, record() stops accepting answers
+    instead of holding them in memory forever.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 500, flush_every: float = 1.0, max_queue: int = 10000):
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_every = max(0.05, flush_every)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(self.batch_size, max_queue))
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---- writes ----
+    def record(self, user_id: str, kind: str, answers: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue answers [{"code", "chosen"}...] for user_id. Returns how many were queued
+        (fewer than given when the queue is full).
+        """
+        now = time.time()
+        n = 0
+        for a in answers:
+            code = str(a.get("code") or "").strip()
+            chosen = str(a.get("chosen") or "").strip()
+            if not code:
+                continue
+            try:
+                self._queue.put_nowait((user_id, kind, code, chosen, int(code == chosen), now))
+            except queue.Full:
+                break
+            n += 1
+        return n
+
+    def _write(self, conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        codes: Dict[tuple, list] = {}
+        prefixes: Dict[tuple, list] = {}
+        for user_id, kind, code, _chosen, correct, ts in batch:
+            delta = -1 if correct else 1
+            for acc, key in ((codes, (user_id, kind, code)), (prefixes, (user_id, kind, code_prefix(kind, code)))):
+                row = acc.setdefault(key, [0, ts])
+                row[0] += delta
+                row[1] = max(row[1], ts)
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO attempts (user_id, kind, code, chosen, correct, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            for table, col, acc in (("missed_codes", "code", codes), ("missed_prefixes", "prefix", prefixes)):
+                conn.executemany(
+                    _UPSERT.format(table=table, col=col),
+                    [(*k, d, ts) for k, (d, ts) in acc.items() if d > 0],
+                )
+                conn.executemany(
+                    _LOWER.format(table=table, col=col),
+                    [(d, ts, *k) for k, (d, ts) in acc.items() if d < 0],
+                )
+
+    def _run(self) -> None:
+        conn = self._connect()
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_every
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write(conn, batch)
+            except Exception as e:
+                # drop the batch but keep the only writer thread alive
+                print(f"[attempts] write of {len(batch)} answers failed:", repr(e))
+        conn.close()
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="attempts-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Flush what is queued and stop the writer.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                print("[attempts] writer did not drain the queue; stopping without a final flush")
+            self._thread.join(timeout)
+        self._thread = None
+
+    # ---- reads (indexed, no history scan) ----
+    def weak_codes(self, user_id: str, kind: str, limit: int = 50) -> List[str]:
+        rows = self._reader().execute(
+            "SELECT code FROM missed_codes WHERE user_id = ? AND kind = ? AND misses > 0 "
+            "ORDER BY misses DESC, last_ts DESC LIMIT ?",
+            (user_id, kind, limit),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def weak_prefixes(self, user_id: str, kind: str, limit: int = 10) -> List[str]:
+        rows = self._reader().execute(
+            "SELECT prefix FROM missed_prefixes WHERE user_id = ? AND kind = ? AND misses > 0 "
+            "ORDER BY misses DESC, last_ts DESC LIMIT ?",
+            (user_id, kind, limit),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def summary(self, user_id: str) -> Dict[str, Any]:
+        conn = self._reader()
+        out: Dict[str, Any] = {"user_id": user_id, "kinds": {}}
+        for kind, total, correct in conn.execute(
+            "SELECT kind, COUNT(*), SUM(correct) FROM attempts WHERE user_id = ? GROUP BY kind", (user_id,)
+        ):
+            out["kinds"][kind] = {
+                "answered": total,
+                "correct": int(correct or 0),
+                "weak_codes": self.weak_codes(user_id, kind, 10),
+                "weak_prefixes": self.weak_prefixes(user_id, kind, 5),
+            }
+        return out
+
+
+def from_env() -> Optional[AttemptStore]:
+    v = (os.environ.get("TARMEEZ_ATTEMPTS_DB") or "").strip()
+    if v == "0":
+        return None
+    try:
+        return AttemptStore(
+            Path(v) if v else DEFAULT_DB_FILE,
+            batch_size=int(os.environ.get("TARMEEZ_ATTEMPTS_BATCH", 500)),
+            flush_every=float(os.environ.get("TARMEEZ_ATTEMPTS_FLUSH", 1)),
+            max_queue=int(os.environ.get("TARMEEZ_ATTEMPTS_QUEUE", 10000)),
+        )
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print("[attempts] store disabled:", e)
+        return None
@@ -0,0 +1,218 @@
+# app/browse.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+ROOT = "root"
+
+# ---- ICD-10-CM chapters (first category, last category, title) ----
+_ICD10_CHAPTERS = [
+    ("A00", "B99", "Certain infectious and parasitic diseases"),
+    ("C00", "D49", "Neoplasms"),
+    ("D50", "D89", "Diseases of the blood and immune mechanism"),
+    ("E00", "E89", "Endocrine, nutritional and metabolic diseases"),
+    ("F01", "F99", "Mental, behavioral and neurodevelopmental disorders"),
+    ("G00", "G99", "Diseases of the nervous system"),
+    ("H00", "H59", "Diseases of the eye and adnexa"),
+    ("H60", "H95", "Diseases of the ear and mastoid process"),
+    ("I00", "I99", "Diseases of the circulatory system"),
+    ("J00", "J99", "Diseases of the respiratory system"),
+    ("K00", "K95", "Diseases of the digestive system"),
+    ("L00", "L99", "Diseases of the skin and subcutaneous tissue"),
+    ("M00", "M99", "Diseases of the musculoskeletal system and connective tissue"),
+    ("N00", "N99", "Diseases of the genitourinary system"),
+    ("O00", "O9A", "Pregnancy, childbirth and the puerperium"),
+    ("P00", "P96", "Certain conditions originating in the perinatal period"),
+    ("Q00", "Q99", "Congenital malformations and chromosomal abnormalities"),
+    ("R00", "R99", "Symptoms, signs and abnormal findings"),
+    ("S00", "T88", "Injury, poisoning and other consequences of external causes"),
+    ("U00", "U85", "Codes for special purposes"),
+    ("V00", "Y99", "External causes of morbidity"),
+    ("Z00", "Z99", "Factors influencing health status and contact with health services"),
+]
+
+# ---- CPT sections (numeric ranges on the 5 digits) ----
+# bounds are aligned to 100-code blocks so one range node (e.g. 992xx)
+# never straddles two sections
+_CPT_SECTIONS = [
+    ("em", 99200, 99499, "Evaluation and Management"),
+    ("anesthesia", 100, 1999, "Anesthesia"),
+    ("surgery", 10000, 69999, "Surgery"),
+    ("radiology", 70000, 79999, "Radiology"),
+    ("pathology", 80000, 89999, "Pathology and Laboratory"),
+    ("medicine", 90000, 99999, "Medicine"),
+]
+_CPT_CAT2 = ("cat2", "Category II (performance measures)")
+_CPT_CAT3 = ("cat3", "Category III (emerging technology)")
+_OTHER = ("other", "Other")
+
+
+def _empty_index(kind: str, root_label: str) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "children": {ROOT: []},
+        "count": {ROOT: 0},
+        "label": {ROOT: root_label},
+        "leaf": set(),
+    }
+
+
+def _add_level(index: Dict[str, Any], parent_of: pd.Series, items: pd.Series) -> None:
+    """
+    Attach `items` (already sorted) under their parent node ids.
+    """
+    for parent, group in items.groupby(parent_of.values, sort=False):
+        index["children"][parent] = group.tolist()
+
+
+def _codes_frame(df: pd.DataFrame) -> pd.DataFrame:
+    work = df[["code", "description"]].dropna().astype(str)
+    work["code"] = work["code"].str.strip()
+    work["description"] = work["description"].str.strip()
+    work = work[work["code"] != ""]
+    return work.drop_duplicates(subset=["code"]).sort_values("code").reset_index(drop=True)
+
+
+def _finish(index: Dict[str, Any], work: pd.DataFrame, levels: List[pd.Series]) -> Dict[str, Any]:
+    """
+    levels: parent id per code, from the top level down to the direct parent.
+    Builds children lists, leaf labels and precomputed counts.
+    """
+    codes = work["code"]
+    index["label"].update(zip(codes.tolist(), work["description"].tolist()))
+    index["leaf"] = set(codes.tolist())
+
+    # codes under their direct parent (an ICD category like I10 can be a code itself)
+    own = codes.values != levels[-1].values
+    _add_level(index, levels[-1][own], codes[own])
+
+    # intermediate nodes (unique, in first-seen order of sorted codes)
+    parents = [pd.Series([ROOT] * len(work))] + levels
+    for upper, lower in zip(parents[:-1], parents[1:]):
+        pairs = pd.DataFrame({"p": upper.values, "c": lower.values}).drop_duplicates("c")
+        _add_level(index, pairs["p"], pairs["c"])
+
+    # counts: number of codes below each node
+    for level in levels:
+        index["count"].update(level.value_counts().astype(int).to_dict())
+    index["count"][ROOT] = int(len(work))
+    return index
+
+
+def build_icd_hierarchy(df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    ICD-10: root -> chapter (chNN) -> 3-character category (E11) -> codes (E11.9 ...)
+    """
+    index = _empty_index("icd", "ICD-10-CM")
+    if df is None or df.empty:
+        return index
+
+    work = _codes_frame(df)
+    cat = work["code"].str.replace(".", "", regex=False).str[:3].str.upper()
+
+    starts = np.array([c[0] for c in _ICD10_CHAPTERS])
+    ends = np.array([c[1] for c in _ICD10_CHAPTERS])
+    pos = np.searchsorted(starts, cat.to_numpy(dtype=str), side="right") - 1
+    ok = (pos >= 0) & (cat.to_numpy(dtype=str) <= ends[np.clip(pos, 0, None)])
+    chapter = pd.Series(pos + 1).map("ch{:02d}".format).where(ok, _OTHER[0])
+
+    for i, (first, last, title) in enumerate(_ICD10_CHAPTERS, start=1):
+        index["label"][f"ch{i:02d}"] = f"{title} ({first}-{last})"
+    index["label"][_OTHER[0]] = _OTHER[1]
+    for c in cat.unique().tolist():
+        index["label"].setdefault(c, f"Category {c}")
+
+    index = _finish(index, work, [chapter, cat])
+    # chapters in book order, not first-seen order
+    index["children"][ROOT] = sorted(index["children"][ROOT], key=lambda n: (n == _OTHER[0], n))
+    return index
+
+
+def build_cpt_hierarchy(df: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    CPT: root -> section -> range (992xx, 000xT, 000xF) -> codes
+    """
+    index = _empty_index("cpt", "CPT")
+    if df is None or df.empty:
+        return index
+
+    work = _codes_frame(df)
+    codes = work["code"].str.upper()
+
+    suffix = codes.str[-1]
+    is_cat2 = codes.str.match(r"^\d{4}F$")
+    is_cat3 = codes.str.match(r"^\d{4}T$")
+    digits = pd.to_numeric(codes.where(codes.str.match(r"^\d{5}$")), errors="coerce")
+
+    section = pd.Series(_OTHER[0], index=work.index, dtype=object)
+    # wide ranges first so the narrower E/M range (inside Medicine) wins
+    for name, lo, hi, _title in sorted(_CPT_SECTIONS, key=lambda s: s[1] - s[2]):
+        section[(digits >= lo) & (digits <= hi)] = name
+    section[is_cat2] = _CPT_CAT2[0]
+    section[is_cat3] = _CPT_CAT3[0]
+
+    letter = is_cat2 | is_cat3
+    rng = codes.str[:3] + np.where(letter, "x" + suffix, "xx")
+    rng = pd.Series(np.where(section == _OTHER[0], _OTHER[0] + ":" + codes.str[:1], rng), index=work.index)
+
+    for name, _lo, _hi, title in _CPT_SECTIONS:
+        index["label"][name] = title
+    for name, title in (_CPT_CAT2, _CPT_CAT3, _OTHER):
+        index["label"][name] = title
+    for r in rng.unique().tolist():
+        index["label"][r] = f"Codes {r}"
+
+    index = _finish(index, work, [section, rng])
+    order = [s[0] for s in _CPT_SECTIONS] + [_CPT_CAT2[0], _CPT_CAT3[0], _OTHER[0]]
+    index["children"][ROOT] = [s for s in order if s in index["children"]]
+    return index
+
+
+def browse(index: Dict[str, Any], node: str, cursor: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+    """
+    One page of a node's children.
+    cursor is the opaque value returned as next_cursor (an offset into the child list).
+    Raises KeyError for unknown nodes and ValueError for a bad cursor.
+    """
+    node = (node or ROOT).strip()
+    if node not in index["label"]:
+        # allow lower-case ids from the URL (e.g. e11.9)
+        up = node.upper()
+        if up not in index["label"]:
+            raise KeyError(node)
+        node = up
+
+    try:
+        start = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError("invalid cursor")
+    if start < 0:
+        raise ValueError("invalid cursor")
+
+    limit = max(1, min(500, int(limit)))
+    kids = index["children"].get(node, [])
+    page = kids[start:start + limit]
+    end = start + len(page)
+
+    leaf = index["leaf"]
+    return {
+        "kind": index["kind"],
+        "node": node,
+        "label": index["label"][node],
+        "count": index["count"].get(node, 1 if node in leaf else 0),
+        "total_children": len(kids),
+        "children": [
+            {
+                "node": c,
+                "label": index["label"].get(c, c),
+                "count": index["count"].get(c, 1),
+                "leaf": c in leaf and c not in index["children"],
+            }
+            for c in page
+        ],
+        "next_cursor": str(end) if end < len(kids) else None,
+    }
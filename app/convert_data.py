@@ -0,0 +1,68 @@
+# app/convert_data.py
+"""
+Convert the messy CSV code sets into clean columnar files that load_cpt /
+load_icd10 pick up automatically (no CSV re-parsing at startup).
+
+Examples (from the repo root):
+    python -m app.convert_data                      # data/cpt.csv -> data/cpt.arrow, same for icd10
+    python -m app.convert_data --format parquet
+    python -m app.convert_data data/cpt_2023.csv    # any CSV; kind guessed from the name
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+from app.load_data import CPT_FILE, ICD_FILE, load_cpt, load_icd10, pa, pq
+
+
+def _kind_for(path: Path) -> str:
+    return "icd" if path.name.lower().startswith("icd") else "cpt"
+
+
+def convert(src: Path, fmt: str = "arrow", out: Optional[Path] = None) -> Path:
+    """
+    Parse one CSV with the normal loader and write it as Arrow IPC or Parquet.
+    Returns the written path.
+    """
+    if pa is None:
+        raise ImportError("Converting data files needs pyarrow (pip install pyarrow)")
+
+    src = Path(src)
+    kind = _kind_for(src)
+    df = load_icd10(src) if kind == "icd" else load_cpt(src)
+    df = df.reset_index(drop=True)
+
+    out = Path(out) if out else src.with_suffix(".parquet" if fmt == "parquet" else ".arrow")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if fmt == "parquet":
+        pq.write_table(table, out, compression="zstd")
+    else:
+        # uncompressed so the file can be memory-mapped without a decode step
+        with pa.OSFile(str(out), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    print(f"[convert] {src.name} -> {out.name} | rows={table.num_rows} | columns={table.column_names}")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", type=Path, help="CSV files (default: data/cpt.csv and data/icd10.csv)")
+    ap.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+    ap.add_argument("--out", type=Path, help="output path (only with a single input file)")
+    args = ap.parse_args()
+
+    files = args.files or [p for p in (CPT_FILE, ICD_FILE) if p.exists()]
+    if args.out and len(files) != 1:
+        ap.error("--out needs exactly one input file")
+
+    for f in files:
+        convert(f, args.format, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,156 @@ from pathlib import Path
 import pandas as pd
 import csv
 
+# optional: columnar (Arrow IPC / Parquet) data files
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
 CPT_FILE = DATA_DIR / "cpt.csv"
 ICD_FILE = DATA_DIR / "icd10.csv"
 
+# pre-cleaned columnar files (see app/convert_data.py); preferred over CSV when present
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+PARQUET_SUFFIXES = (".parquet",)
+COLUMNAR_SUFFIXES = ARROW_SUFFIXES + PARQUET_SUFFIXES
+
+# columns the app uses; everything else in a columnar file is never read
+CPT_COLUMNS = ["code", "description", "section", "keywords"]
+ICD_COLUMNS = ["code", "description", "keywords", "hipaa_covered", "deleted"]
+
+# yearly releases next to the current files: cpt_2024.csv, icd10_2023.csv ...
+_VERSION_PREFIX = {"cpt": "cpt_", "icd": "icd10_"}
+
+
+def _stale(columnar, csv_file):
+    """
+    True when the CSV was edited after the columnar file was converted from it.
+    """
+    try:
+        return csv_file.exists() and csv_file.stat().st_mtime > columnar.stat().st_mtime
+    except OSError:
+        return False
+
+
+def _default_source(csv_file):
+    """
+    data/cpt.arrow or data/cpt.parquet if one exists (and pyarrow is installed), else the CSV.
+    A columnar file older than the CSV is skipped (re-run app.convert_data to refresh it).
+    """
+    if pa is not None:
+        for suffix in (".arrow", ".parquet"):
+            p = csv_file.with_suffix(suffix)
+            if not p.exists():
+                continue
+            if _stale(p, csv_file):
+                print(f"[data] {p.name} is older than {csv_file.name}; using the CSV (re-run app.convert_data)")
+                continue
+            return p
+    return csv_file
+
+
+def find_versions(kind):
+    """
+    Versioned code-set files for kind ("cpt"/"icd") -> {version: path}, sorted by version.
+    A columnar file wins over a CSV of the same version unless the CSV is newer.
+    """
+    prefix = _VERSION_PREFIX["icd" if kind in ("icd", "icd10") else "cpt"]
+    suffixes = (".csv",) + (COLUMNAR_SUFFIXES if pa is not None else ())
+    found = {}
+    for p in sorted(DATA_DIR.glob(f"{prefix}*"), key=lambda p: p.suffix != ".csv"):
+        if p.suffix.lower() not in suffixes:
+            continue
+        version = p.stem[len(prefix):].strip()
+        if not version:
+            continue
+        prev = found.get(version)
+        if prev is not None and prev.suffix.lower() == ".csv" and _stale(p, prev):
+            print(f"[data] {p.name} is older than {prev.name}; using the CSV (re-run app.convert_data)")
+            continue
+        found[version] = p
+    return dict(sorted(found.items()))
+
+
+def load_columnar(path, kind):
+    """
+    Read a pre-cleaned Arrow IPC / Parquet file.
+    - memory-mapped (no copy of the file into Python buffers before conversion)
+    - column pruning: only code/description/keywords (+ section / flags) are read
+    """
+    if pa is None:
+        raise ImportError("Reading .arrow/.parquet data files needs pyarrow (pip install pyarrow)")
+
+    src = Path(path)
+    if not src.exists():
+        raise FileNotFoundError(f"Missing file: {src}")
+
+    kind = "icd" if kind in ("icd", "icd10") else "cpt"
+    wanted = ICD_COLUMNS if kind == "icd" else CPT_COLUMNS
+    suffix = src.suffix.lower()
+
+    if suffix in PARQUET_SUFFIXES:
+        names = pq.read_schema(src).names
+        table = pq.read_table(src, columns=[c for c in wanted if c in names], memory_map=True)
+        source = None
+    elif suffix in ARROW_SUFFIXES:
+        # zero-copy: the table points into the mapping, so unused columns are never paged in
+        source = pa.memory_map(str(src), "r")
+        table = pa.ipc.open_file(source).read_all()
+        table = table.select([c for c in wanted if c in table.column_names])
+    else:
+        raise ValueError(f"Not a columnar data file: {src}")
+
+    try:
+        if "code" not in table.column_names or "description" not in table.column_names:
+            raise ValueError(f"{src} must have 'code' and 'description' columns")
+        df = table.to_pandas()
+    finally:
+        del table
+        if source is not None:
+            source.close()
+    if "keywords" not in df.columns:
+        df["keywords"] = df["description"].str.lower()
+    if kind == "cpt" and "section" not in df.columns:
+        df["section"] = ""
+
+    label = "ICD" if kind == "icd" else "CPT"
+    print(f"[{label}] loaded rows={len(df)} | columnar | file={src}")
+    if df.empty:
+        raise ValueError(f"{label} loaded 0 rows")
+
+    return df[[c for c in wanted if c in df.columns]]
+
+
+def _flag(v):
+    return (v or "").strip().lower() in ("1", "true", "t", "yes", "y")
+
 
-def load_cpt():
+def load_cpt(path=None):
     """
     CPT robust loader for messy CSV:
     - handles double quotes "" inside fields
     - handles lines ending with ';'
     - handles rows that come in as a single wrapped field
     - merges extra commas into description
+    path: another CPT file (default: data/cpt.arrow / cpt.parquet if present, else data/cpt.csv);
+          .arrow/.parquet files go through load_columnar()
     """
-    if not CPT_FILE.exists():
-        raise FileNotFoundError(f"Missing file: {CPT_FILE}")
+    src = Path(path) if path else _default_source(CPT_FILE)
+    if src.suffix.lower() in COLUMNAR_SUFFIXES:
+        return load_columnar(src, "cpt")
+    if not src.exists():
+        raise FileNotFoundError(f"Missing file: {src}")
 
     rows = []
     bad = 0
 
-    with open(CPT_FILE, "r", encoding="utf-8", errors="replace", newline="") as f:
+    with open(src, "r", encoding="utf-8", errors="replace", newline="") as f:
         reader = csv.reader(f, delimiter=",", quotechar='"')
         _header = next(reader, None)  # skip header
 
@@ -74,7 +202,7 @@ def load_cpt():
             })
 
     df = pd.DataFrame(rows).drop_duplicates(subset=["code", "description"])
-    print(f"[CPT] loaded rows={len(df)} | bad_rows={bad} | file={CPT_FILE}")
+    print(f"[CPT] loaded rows={len(df)} | bad_rows={bad} | file={src}")
 
     if df.empty:
         raise ValueError("CPT loaded 0 rows")
@@ -82,20 +210,25 @@ def load_cpt():
     return df[["code", "description", "section", "keywords"]]
 
 
-def load_icd10():
+def load_icd10(path=None):
     """
     ICD-10 loader for your wrapped-row CSV.
     Columns:
     Id,Code,CodeWithSeparator,ShortDescription,LongDescription,HippaCovered,Deleted
     Many rows may come as a single quoted field -> we parse twice when needed.
+    path: another ICD-10 file (default: data/icd10.arrow / icd10.parquet if present, else data/icd10.csv);
+          .arrow/.parquet files go through load_columnar()
     """
-    if not ICD_FILE.exists():
-        raise FileNotFoundError(f"Missing file: {ICD_FILE}")
+    src = Path(path) if path else _default_source(ICD_FILE)
+    if src.suffix.lower() in COLUMNAR_SUFFIXES:
+        return load_columnar(src, "icd")
+    if not src.exists():
+        raise FileNotFoundError(f"Missing file: {src}")
 
     rows = []
     bad = 0
 
-    with open(ICD_FILE, "r", encoding="utf-8", errors="replace", newline="") as f:
+    with open(src, "r", encoding="utf-8", errors="replace", newline="") as f:
         reader = csv.reader(f, delimiter=",", quotechar='"')
         _header = next(reader, None)  # skip header
 
@@ -135,11 +268,13 @@ def load_icd10():
             rows.append({
                 "code": code_sep,
                 "description": long_desc,
-                "keywords": short_desc.lower()
+                "keywords": short_desc.lower(),
+                "hipaa_covered": _flag(hipaa),
+                "deleted": _flag(deleted),
             })
 
     df = pd.DataFrame(rows).drop_duplicates(subset=["code", "description"])
-    print(f"[ICD] loaded rows={len(df)} | bad_rows={bad} | file={ICD_FILE}")
+    print(f"[ICD] loaded rows={len(df)} | bad_rows={bad} | file={src}")
 
     if df.empty:
         raise ValueError("ICD loaded 0 rows")
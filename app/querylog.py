@@ -0,0 +1,222 @@
+# app/querylog.py
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.load_data import DATA_DIR
+
+
+# ----------------------------
+# Settings (env, all opt-in)
+# ----------------------------
+# TARMEEZ_QUERY_LOG        "1" -> data/query_log.json, or a file path; unset/"0" -> off
+# TARMEEZ_QUERY_LOG_MAX    max distinct queries kept per kind (default 5000)
+# TARMEEZ_QUERY_LOG_FLUSH  seconds between writes (default 60)
+# TARMEEZ_QUERY_LOG_KEEP   rotated copies kept: query_log.json.1 ... (default 3)
+# TARMEEZ_WARM_TOP         top-N queries per kind replayed at startup (default 200)
+DEFAULT_LOG_FILE = DATA_DIR / "query_log.json"
+
+_MAX_QUERY_LEN = 64
+# only things that look like search terms or codes; anything else is not stored
+_SAFE_RE = re.compile(r"^[\w .,'/()\-]+$")
+_EMAIL_RE = re.compile(r"@|\d{6,}")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def log_path() -> Optional[Path]:
+    v = (os.environ.get("TARMEEZ_QUERY_LOG") or "").strip()
+    if not v or v == "0":
+        return None
+    if v == "1":
+        return DEFAULT_LOG_FILE
+    return Path(v)
+
+
+def normalize_query(q: str) -> Optional[str]:
+    """
+    Normalized form that is stored and used as a cache key.
+    Same normalization as search._clean (strip + lower), plus privacy checks:
+    too long, odd characters, e-mails or long digit runs (phone/ID numbers)
+    -> None (not logged).
+    """
+    qn = (q or "").strip().lower()
+    if not qn or len(qn) > _MAX_QUERY_LEN:
+        return None
+    if not _SAFE_RE.match(qn) or _EMAIL_RE.search(qn):
+        return None
+    return qn
+
+
+class QueryLog:
+    """
+    Bounded in-memory counter of normalized queries per kind, written to a
+    small JSON file by a background thread. Each write rotates the previous
+    file (query_log.json -> .1 -> .2 ...), keeping `keep` copies.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 5000, flush_every: float = 60.0, keep: int = 3):
+        self.path = Path(path)
+        self.max_entries = max(10, max_entries)
+        self.flush_every = max(1.0, flush_every)
+        self.keep = max(0, keep)
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # increments since the last flush; merged into the file on write so
+        # several workers sharing one log don't overwrite each other
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    # ---- file io ----
+    def _read(self) -> Dict[str, Dict[str, int]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        out: Dict[str, Dict[str, int]] = {}
+        for kind, counts in (data.get("queries") or {}).items():
+            if isinstance(counts, dict):
+                out[kind] = {str(q): int(c) for q, c in counts.items() if normalize_query(str(q))}
+        return out
+
+    def _load(self) -> None:
+        self._counts = {kind: self._bounded(counts) for kind, counts in self._read().items()}
+
+    def _rotate(self) -> None:
+        if self.keep <= 0 or not self.path.exists():
+            return
+        for i in range(self.keep - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        merged = self._read()
+        for kind, counts in pending.items():
+            target = merged.setdefault(kind, {})
+            for q, c in counts.items():
+                target[q] = target.get(q, 0) + c
+
+        merged = {kind: self._bounded(counts) for kind, counts in merged.items()}
+        snapshot = {k: dict(v) for k, v in merged.items()}
+
+        with self._lock:
+            # in-memory view = file + increments that arrived while writing
+            view = {k: dict(v) for k, v in merged.items()}
+            for kind, counts in self._pending.items():
+                target = view.setdefault(kind, {})
+                for q, c in counts.items():
+                    target[q] = target.get(q, 0) + c
+            self._counts = view
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"updated": int(time.time()), "queries": snapshot}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        self._rotate()
+        os.replace(tmp, self.path)
+
+    # ---- counting ----
+    def _bounded(self, counts: Dict[str, int]) -> Dict[str, int]:
+        if len(counts) <= self.max_entries:
+            return counts
+        # keep the most popular 90% of the cap so we don't prune on every insert
+        keep = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[: int(self.max_entries * 0.9)]
+        return dict(keep)
+
+    def record(self, kind: str, q: str) -> None:
+        qn = normalize_query(q)
+        if qn is None:
+            return
+        with self._lock:
+            counts = self._counts.setdefault(kind, {})
+            counts[qn] = counts.get(qn, 0) + 1
+            pending = self._pending.setdefault(kind, {})
+            pending[qn] = pending.get(qn, 0) + 1
+            if len(pending) > self.max_entries:
+                self._pending[kind] = self._bounded(pending)
+            if len(counts) > self.max_entries:
+                self._counts[kind] = self._bounded(counts)
+
+    def top(self, kind: str, n: int) -> List[str]:
+        with self._lock:
+            counts = dict(self._counts.get(kind, {}))
+        return [q for q, _ in sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:n]]
+
+    # ---- background writer ----
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_every):
+            try:
+                self.flush()
+            except OSError as e:
+                print("[querylog] flush failed:", e)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="querylog", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.flush()
+        except OSError as e:
+            print("[querylog] flush failed:", e)
+
+
+def from_env() -> Optional[QueryLog]:
+    path = log_path()
+    if path is None:
+        return None
+    return QueryLog(
+        path,
+        max_entries=_env_int("TARMEEZ_QUERY_LOG_MAX", 5000),
+        flush_every=float(_env_int("TARMEEZ_QUERY_LOG_FLUSH", 60)),
+        keep=_env_int("TARMEEZ_QUERY_LOG_KEEP", 3),
+    )
+
+
+def warm_in_background(qlog: QueryLog, search: Callable[[str, str], object], kinds: List[str]) -> threading.Thread:
+    """
+    Replay the top-N logged queries per kind through `search(kind, q)`
+    in a daemon thread, so caches are filled before traffic arrives.
+    """
+    top_n = _env_int("TARMEEZ_WARM_TOP", 200)
+
+    def _warm() -> None:
+        t0 = time.perf_counter()
+        done = 0
+        for kind in kinds:
+            for q in qlog.top(kind, top_n):
+                try:
+                    search(kind, q)
+                    done += 1
+                except Exception as e:
+                    print(f"[querylog] warm {kind}:{q!r} failed:", e)
+        print(f"[querylog] warmed {done} queries in {time.perf_counter() - t0:.2f}s")
+
+    th = threading.Thread(target=_warm, name="cache-warm", daemon=True)
+    th.start()
+    return th
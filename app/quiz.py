@@ -5,6 +5,7 @@ import random
 import re
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 
@@ -128,6 +129,98 @@ def _difficulty(kind: str, code: str, desc: str, icd_flavor: str) -> str:
     return "hard"
 
 
+_DIFFICULTY_WORDS = ["with", "without", "complication", "unspecified", "status", "due to", "associated"]
+_DIFFICULTY_PUNCT = [",", "(", ")", ";", ":"]
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def _difficulty_series(kind: str, codes: pd.Series, descs: pd.Series, icd_flavor: str) -> pd.Series:
+    """
+    Vectorized version of _difficulty() for a whole column (same rules).
+    """
+    kind = (kind or "").lower()
+    codes = codes.astype(str)
+    descs = descs.astype(str)
+
+    score = (descs.str.len() // 35).clip(upper=3).astype(int)
+    words = "|".join(re.escape(w) for w in _DIFFICULTY_WORDS)
+    score += descs.str.lower().str.contains(words, regex=True, na=False).astype(int)
+    punct = "[" + re.escape("".join(_DIFFICULTY_PUNCT)) + "]"
+    score += descs.str.contains(punct, regex=True, na=False).astype(int)
+    if kind == "icd" and icd_flavor == "icd10":
+        score += codes.str.contains(".", regex=False, na=False).astype(int)
+
+    out = np.where(score <= 1, "easy", np.where(score == 2, "medium", "hard"))
+    return pd.Series(out, index=codes.index, dtype=object)
+
+
+def prepare_quiz_pool(df: pd.DataFrame, kind: str) -> Dict[str, Any]:
+    """
+    Run once at load time:
+    normalize + filter the frame, add a 'difficulty' column and keep
+    per-difficulty row index arrays so sampling never scans the pool.
+    """
+    kind = (kind or "").lower()
+    if kind not in ("cpt", "icd"):
+        kind = "cpt"
+
+    if df is None or df.empty:
+        work, icd_flavor = pd.DataFrame(columns=["code", "description"]), "icd10"
+    else:
+        work = _normalize_df(df)
+        work, icd_flavor = _filter_by_kind(work, kind)
+
+    work["difficulty"] = _difficulty_series(kind, work["code"], work["description"], icd_flavor)
+    diff = work["difficulty"].to_numpy()
+
+    # same areas as app.attempts.code_prefix: CPT 3-digit range, ICD 3-char category
+    codes_up = work["code"].astype(str).str.upper()
+    if kind == "icd":
+        prefix = codes_up.str.replace(".", "", regex=False).str[:3]
+    else:
+        prefix = codes_up.str[:3]
+
+    # per-row question parts as plain lists (no per-cell DataFrame access at request time)
+    codes_l = work["code"].astype(str).tolist()
+    descs_l = work["description"].astype(str).tolist()
+    extra_cols = [c for c in ("section", "chapter", "domain") if c in work.columns]
+    extra_vals = [work[c].astype(object).where(work[c].notna(), "").astype(str).str.strip().tolist() for c in extra_cols]
+    hints = [
+        _hint(kind, code, dict(zip(extra_cols, vals)), icd_flavor)
+        for code, vals in zip(codes_l, zip(*extra_vals) if extra_cols else [()] * len(codes_l))
+    ]
+
+    return {
+        "kind": kind,
+        "work": work,
+        "icd_flavor": icd_flavor,
+        "rows": list(zip(codes_l, descs_l, hints, work["difficulty"].tolist())),
+        "codes": np.array(work["code"].unique().tolist(), dtype=object),
+        "by_difficulty": {d: np.flatnonzero(diff == d) for d in DIFFICULTIES},
+        "by_code": work.groupby("code").indices,
+        "by_prefix": prefix.groupby(prefix.to_numpy()).indices,
+    }
+
+
+def weak_positions(pool: Dict[str, Any], codes: List[str], prefixes: List[str], limit: int = 500) -> List[int]:
+    """
+    Pool rows for a user's weak codes first, then rows in their weak prefixes
+    (dict lookups only; order = weakest first, no duplicates).
+    """
+    out: List[int] = []
+    seen = set()
+    for key, index in ((codes, pool["by_code"]), (prefixes, pool["by_prefix"])):
+        for k in key:
+            for i in index.get(k, ()):
+                i = int(i)
+                if i not in seen:
+                    seen.add(i)
+                    out.append(i)
+                    if len(out) >= limit:
+                        return out
+    return out
+
+
 def _hint(kind: str, code: str, row: Dict[str, Any], icd_flavor: str) -> str:
     """
     Hint text shown in UI.
@@ -154,24 +247,31 @@ def _hint(kind: str, code: str, row: Dict[str, Any], icd_flavor: str) -> str:
     return f"💡 Starts with {prefix}"
 
 
-def _pick_wrong_codes(work: pd.DataFrame, answer_code: str, k: int = 3) -> List[str]:
+def _pick_wrong_from_pool(codes: np.ndarray, answer_code: str, k: int = 3) -> List[str]:
     """
-    Sample wrong options from the same dataset.
+    Sample k wrong options (codes other than answer_code) from the pool's unique codes array.
     """
-    answer_code = str(answer_code).strip()
-    pool = work["code"].astype(str).str.strip()
-    pool = pool[pool != answer_code].dropna().unique().tolist()
-
-    if not pool:
-        return []
-    if len(pool) <= k:
-        return random.sample(pool, len(pool))
-    return random.sample(pool, k)
-
-
-def build_quiz(df: pd.DataFrame, kind: str, n: int = 10) -> Dict[str, Any]:
+    if len(codes) <= k + 1:
+        return [c for c in codes.tolist() if c != answer_code]
+    picks = random.sample(range(len(codes)), k + 1)
+    wrong = [codes[i] for i in picks if codes[i] != answer_code]
+    return wrong[:k]
+
+
+def build_quiz(
+    df: pd.DataFrame,
+    kind: str,
+    n: int = 10,
+    difficulty: Optional[str] = None,
+    pool: Optional[Dict[str, Any]] = None,
+    prefer: Optional[List[int]] = None,
+    prefer_share: float = 0.0,
+) -> Dict[str, Any]:
     """
     Main function used by API.
+    `pool` is the output of prepare_quiz_pool(); when missing it is built on the fly.
+    `difficulty` ("easy"/"medium"/"hard") restricts questions to that level.
+    `prefer` are pool rows (e.g. weak_positions()) to draw up to `prefer_share` of the questions from.
     Returns:
       {"type": "cpt"/"icd", "questions": [{"prompt","options","answer","hint","difficulty"}...]}
     """
@@ -179,8 +279,10 @@ def build_quiz(df: pd.DataFrame, kind: str, n: int = 10) -> Dict[str, Any]:
     if kind not in ("cpt", "icd"):
         kind = "cpt"
 
-    if df is None or df.empty:
-        return {"type": kind, "questions": []}
+    if pool is None:
+        if df is None or df.empty:
+            return {"type": kind, "questions": []}
+        pool = prepare_quiz_pool(df, kind)
 
     # normalize n
     try:
@@ -189,43 +291,56 @@ def build_quiz(df: pd.DataFrame, kind: str, n: int = 10) -> Dict[str, Any]:
         n = 10
     n = max(5, min(50, n))
 
-    work = _normalize_df(df)
-    work, icd_flavor = _filter_by_kind(work, kind)
+    work = pool["work"]
 
     if work.empty:
         return {"type": kind, "questions": []}
 
-    sample_n = min(n, len(work))
-    idxs = random.sample(range(len(work)), sample_n)
+    if difficulty in DIFFICULTIES:
+        candidates = pool["by_difficulty"][difficulty]
+    else:
+        candidates = np.arange(len(work))
+
+    idxs: List[int] = []
+    if prefer and prefer_share > 0:
+        if difficulty in DIFFICULTIES:
+            diff = work["difficulty"].to_numpy()
+            prefer = [i for i in prefer if diff[i] == difficulty]
+        # weakest rows are first; sample among the top few so quizzes still vary
+        top = prefer[: max(1, int(round(n * prefer_share))) * 3]
+        k = min(len(top), int(round(n * prefer_share)))
+        idxs = random.sample(top, k)
+
+    sample_n = min(n, len(candidates)) - len(idxs)
+    taken = set(idxs)
+    # draw a few extra so rows already taken from `prefer` can be skipped
+    extra = min(len(candidates), sample_n + len(taken))
+    for i in random.sample(range(len(candidates)), extra):
+        if len(idxs) >= min(n, len(candidates)):
+            break
+        c = int(candidates[i])
+        if c not in taken:
+            taken.add(c)
+            idxs.append(c)
+    random.shuffle(idxs)
 
     questions: List[Dict[str, Any]] = []
+    rows = pool["rows"]
 
     for idx in idxs:
-        code = work.at[idx, "code"]
-        desc = work.at[idx, "description"]
+        code, desc, hint, level = rows[idx]
 
-        code = "" if pd.isna(code) else str(code).strip()
-        desc = "" if pd.isna(desc) else str(desc).strip()
-        if not code or not desc:
-            continue
-
-        wrong = _pick_wrong_codes(work, code, k=3)
+        wrong = _pick_wrong_from_pool(pool["codes"], code, k=3)
         options = wrong + [code]
         random.shuffle(options)
 
-        row_dict: Dict[str, Any] = {}
-        for col in ("section", "chapter", "domain"):
-            if col in work.columns:
-                v = work.at[idx, col]
-                row_dict[col] = "" if pd.isna(v) else str(v).strip()
-
         questions.append(
             {
                 "prompt": desc,
                 "options": options,
                 "answer": code,
-                "hint": _hint(kind, code, row_dict, icd_flavor),
-                "difficulty": _difficulty(kind, code, desc, icd_flavor),
+                "hint": hint,
+                "difficulty": level,
             }
         )
 
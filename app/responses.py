@@ -0,0 +1,37 @@
+# app/responses.py
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+
+# optional fast encoder; falls back to the standard json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when available.
+    Return it directly from a route to skip FastAPI's jsonable_encoder pass;
+    the content must already be plain dict/list/str/int/float/bool/None.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def raw_json_response(body: str, status_code: int = 200) -> Response:
+    """
+    Response for a body that is already encoded JSON (e.g. from precomputed fragments).
+    """
+    return Response(content=body.encode("utf-8"), status_code=status_code, media_type="application/json")
@@ -1,8 +1,10 @@
 # app/search.py
 from __future__ import annotations
 
+import json
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Collection, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -15,34 +17,43 @@ def _is_code_like(q: str) -> bool:
     return bool(re.match(r"^[A-Za-z]?\d[\dA-Za-z\.]{1,10}$", q))
 
 
-def free_search(df: pd.DataFrame, q: str, limit: int = 20, kind: str = "cpt") -> List[Dict[str, Any]]:
+def _meta_columns(df: pd.DataFrame, kind: str) -> List[str]:
+    if kind == "cpt":
+        return [c for c in ("section",) if c in df.columns]
+    if kind == "icd":
+        return [c for c in ("chapter", "domain") if c in df.columns]
+    return []
+
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    # same as the old per-row: "" if pd.isna(v) else str(v)
+    s = df[col]
+    return s.astype(object).where(s.notna(), "").astype(str)
+
+
+def _top(df: pd.DataFrame, q: str, limit: int, exclude: Optional[Collection]) -> Tuple[np.ndarray, List[int]]:
     """
-    df requires: code, description
-    optional: keywords, section/chapter/domain
+    Score every row; return (row positions, scores) of the best `limit` rows with score > 0.
     """
     q_raw = (q or "").strip()
     qn = _clean(q_raw)
     if not qn or df is None or df.empty:
-        return []
+        return np.array([], dtype=np.int64), []
 
     # ensure text columns
-    work = df.copy()
     for col in ["code", "description"]:
-        if col not in work.columns:
-            return []
+        if col not in df.columns:
+            return np.array([], dtype=np.int64), []
 
     # optional columns
-    has_keywords = "keywords" in work.columns
-    has_section = "section" in work.columns
-    has_chapter = "chapter" in work.columns
-    has_domain = "domain" in work.columns
+    has_keywords = "keywords" in df.columns
 
     # build searchable field
-    desc = work["description"].astype(str).str.lower()
-    code = work["code"].astype(str).str.lower()
+    desc = df["description"].astype(str).str.lower()
+    code = df["code"].astype(str).str.lower()
 
     if has_keywords:
-        kw = work["keywords"].astype(str).str.lower()
+        kw = df["keywords"].astype(str).str.lower()
         hay = code + " " + desc + " " + kw
     else:
         hay = code + " " + desc
@@ -54,7 +65,7 @@ def free_search(df: pd.DataFrame, q: str, limit: int = 20, kind: str = "cpt") ->
     #  - word overlap next (simple)
     is_code = _is_code_like(q_raw)
 
-    scores = pd.Series(0, index=work.index, dtype="int")
+    scores = pd.Series(0, index=df.index, dtype="int")
 
     if is_code:
         qcode = qn.lower()
@@ -70,28 +81,113 @@ def free_search(df: pd.DataFrame, q: str, limit: int = 20, kind: str = "cpt") ->
     for t in tokens[:6]:
         scores += hay.str.contains(re.escape(t), na=False) * 2
 
-    # pick top
-    top = work.loc[scores.sort_values(ascending=False).head(limit).index].copy()
-    top_scores = scores.loc[top.index].tolist()
-
-    results: List[Dict[str, Any]] = []
-    for i, (_, row) in enumerate(top.iterrows()):
-        meta = {}
-        if kind == "cpt" and has_section:
-            meta["section"] = "" if pd.isna(row.get("section")) else str(row.get("section"))
-        if kind == "icd":
-            if has_chapter:
-                meta["chapter"] = "" if pd.isna(row.get("chapter")) else str(row.get("chapter"))
-            if has_domain:
-                meta["domain"] = "" if pd.isna(row.get("domain")) else str(row.get("domain"))
-
-        results.append({
-            "code": "" if pd.isna(row["code"]) else str(row["code"]),
-            "description": "" if pd.isna(row["description"]) else str(row["description"]),
-            "score": int(top_scores[i]) if i < len(top_scores) else 0,
-            "meta": meta
-        })
-
-    # remove zero-score junk
-    results = [r for r in results if r["score"] > 0]
-    return results
+    if exclude is not None and len(exclude):
+        scores.loc[list(exclude)] = 0
+
+    # pick top, then remove zero-score junk
+    top = scores.sort_values(ascending=False).head(limit)
+    top = top[top > 0]
+    return df.index.get_indexer(top.index), top.tolist()
+
+
+def free_search(
+    df: pd.DataFrame,
+    q: str,
+    limit: int = 20,
+    kind: str = "cpt",
+    exclude: Optional[Collection] = None,
+) -> List[Dict[str, Any]]:
+    """
+    df requires: code, description
+    optional: keywords, section/chapter/domain
+    exclude: index labels of rows to leave out (e.g. rows replaced in another code-set version)
+    """
+    pos, top_scores = _top(df, q, limit, exclude)
+    if not len(pos):
+        return []
+
+    # column-wise on the picked rows only (no iterrows / per-cell isna)
+    picked = df.iloc[pos]
+    codes = _text(picked, "code").tolist()
+    descs = _text(picked, "description").tolist()
+    metas = [{} for _ in codes]
+    for col in _meta_columns(df, kind):
+        for m, v in zip(metas, _text(picked, col).tolist()):
+            m[col] = v
+
+    return [
+        {"code": c, "description": d, "score": int(s), "meta": m}
+        for c, d, s, m in zip(codes, descs, top_scores, metas)
+    ]
+
+
+# ----------------------------
+# Pre-encoded results
+# ----------------------------
+def _dumps(v: Any) -> str:
+    return json.dumps(v, ensure_ascii=False, separators=(",", ":"))
+
+
+def build_fragments(df: pd.DataFrame, kind: str = "cpt") -> Dict[str, np.ndarray]:
+    """
+    Run once at load time: the JSON of every row's result object, split
+    around the per-query score:
+        head = '{"code":"..","description":"..","score":'
+        tail = ',"meta":{..}}'
+    Positions match df rows.
+    """
+    if df is None or df.empty:
+        return {"head": np.array([], dtype=object), "tail": np.array([], dtype=object)}
+
+    codes = _text(df, "code").tolist()
+    descs = _text(df, "description").tolist()
+    meta_cols = _meta_columns(df, kind)
+    meta_vals = [_text(df, c).tolist() for c in meta_cols]
+
+    head = [
+        '{"code":' + _dumps(c) + ',"description":' + _dumps(d) + ',"score":'
+        for c, d in zip(codes, descs)
+    ]
+    if meta_cols:
+        tail = [
+            ',"meta":' + _dumps(dict(zip(meta_cols, vals))) + "}"
+            for vals in zip(*meta_vals)
+        ]
+    else:
+        tail = [',"meta":{}}'] * len(codes)
+
+    return {"head": np.array(head, dtype=object), "tail": np.array(tail, dtype=object)}
+
+
+def render_fragments(fragments: Dict[str, np.ndarray], pos: np.ndarray, scores: List[int]) -> List[Tuple[int, str]]:
+    """
+    (score, JSON object) for the given row positions.
+    """
+    heads = fragments["head"][pos].tolist()
+    tails = fragments["tail"][pos].tolist()
+    return [(s, h + str(int(s)) + t) for h, s, t in zip(heads, scores, tails)]
+
+
+def free_search_json(
+    df: pd.DataFrame,
+    q: str,
+    limit: int = 20,
+    kind: str = "cpt",
+    exclude: Optional[Collection] = None,
+    fragments: Optional[Dict[str, np.ndarray]] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Same ranking as free_search, but returns (score, encoded JSON object)
+    pairs built from precomputed fragments (see build_fragments).
+    """
+    pos, top_scores = _top(df, q, limit, exclude)
+    if not len(pos):
+        return []
+    if fragments is None:
+        fragments = build_fragments(df.iloc[pos], kind)
+        pos = np.arange(len(pos))
+    return render_fragments(fragments, pos, top_scores)
+
+
+def join_json(items: List[Tuple[int, str]]) -> str:
+    return "[" + ",".join(s for _, s in items) + "]"
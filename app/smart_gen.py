@@ -4,6 +4,9 @@ import random
 import random
 import re
 
+import numpy as np
+import pandas as pd
+
 def _digits_prefix(code: str, n: int):
     # خذ أرقام الكود فقط (مفيد لـ CPT مثل 0010T)
     s = re.sub(r"[^0-9]", "", (code or "").strip())
@@ -145,3 +148,161 @@ def generate_case_mcq(df, n_questions=8, lang="en", difficulty="easy", code_type
         })
 
     return questions
+
+# ---------- Bulk exam (vectorized) ----------
+# للاختبارات الكبيرة (500-2000 سؤال): نسحب كل الاختيارات العشوائية كمصفوفات
+# دفعة وحدة بدل random.choice سؤال سؤال.
+_CASE_AGES = np.array([19, 22, 28, 35, 41, 50, 58, 66])
+_CASE_SEXES = {"en": np.array(["male", "female"], dtype=object),
+               "ar": np.array(["ذكر", "أنثى"], dtype=object)}
+
+
+def _exam_group_keys(codes, difficulty, code_type):
+    # نفس قواعد _pick_distractors لكن على عمود كامل
+    if difficulty == "easy":
+        return None
+    if code_type == "icd10":
+        n = 1 if difficulty == "medium" else 2
+        return codes.str.replace(".", "", regex=False).str[:n]
+    n = 3 if difficulty == "medium" else 4
+    return codes.str.replace(r"[^0-9]", "", regex=True).str[:n]
+
+
+def _exam_pool(df, difficulty, code_type):
+    """
+    Prepare arrays for vectorized sampling:
+    codes/descs, plus for every record the slice (start, size) of its
+    distractor group inside `order` and its own position in that slice.
+    Groups with fewer than 3 other codes fall back to the whole pool.
+    """
+    work = df[["code", "description"]].dropna().astype(str)
+    work = work[(work["code"].str.strip() != "") & (work["description"].str.strip() != "")]
+    # الخيارات أكواد، فالكود المكرر ما يصلح مشتت
+    work = work.drop_duplicates(subset=["code"]).reset_index(drop=True)
+    if len(work) < 10:
+        return None
+
+    codes = work["code"].to_numpy(dtype=object)
+    descs = work["description"].to_numpy(dtype=object)
+    total = len(work)
+
+    keys = _exam_group_keys(work["code"], difficulty, code_type)
+    if keys is None:
+        order = np.arange(total)
+        start = np.zeros(total, dtype=np.int64)
+        size = np.full(total, total, dtype=np.int64)
+        pos = np.arange(total, dtype=np.int64)
+    else:
+        gid, _uniq = pd.factorize(keys)
+        order = np.argsort(gid, kind="stable")
+        counts = np.bincount(gid)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        start = starts[gid]
+        size = counts[gid]
+        pos = np.empty(total, dtype=np.int64)
+        pos[order] = np.arange(total) - np.repeat(starts, counts)
+
+        small = size < 4  # الكود نفسه + أقل من 3 مشتتات
+        start = np.where(small, 0, start)
+        size = np.where(small, total, size)
+        # في الحالة الاحتياطية نستخدم ترتيب ثاني يغطي كل السجلات
+        pos_all = np.empty(total, dtype=np.int64)
+        pos_all[order] = np.arange(total)
+        pos = np.where(small, pos_all, pos)
+
+    return {"codes": codes, "descs": descs, "order": order,
+            "start": start, "size": size, "pos": pos}
+
+
+def _exam_distractors(rng, pool, correct):
+    """
+    Draw 3 distinct distractor indices per correct index (shape (m, 3)),
+    excluding the correct record, without any Python-level loop.
+    """
+    m = pool["size"][correct] - 1  # عدد المرشحين بدون الإجابة
+    pos = pool["pos"][correct]
+    k = len(correct)
+
+    a = rng.integers(0, m)
+    b = rng.integers(0, m - 1)
+    c = rng.integers(0, m - 2)
+    # تحويل سحب بدون إرجاع: كل قيمة تتخطى اللي قبلها
+    b = b + (b >= a)
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+    c = c + (c >= lo)
+    c = c + (c >= hi)
+
+    picks = np.stack([a, b, c], axis=1)
+    # تخطّي موقع الإجابة الصحيحة داخل المجموعة
+    picks = picks + (picks >= pos.reshape(k, 1))
+    return pool["order"][pool["start"][correct].reshape(k, 1) + picks]
+
+
+def generate_exam(df, n_questions=500, lang="en", difficulty="easy", code_type="cpt",
+                  case=False, batch_size=500, seed=None):
+    """
+    Bulk generator for large practice exams. Yields lists of question dicts
+    (same shape as generate_smart_mcq / generate_case_mcq) in batches of
+    `batch_size`, so callers can stream the exam as it is produced.
+    """
+    lang = "ar" if lang == "ar" else "en"
+    difficulty = difficulty if difficulty in ("easy", "medium", "hard") else "easy"
+
+    pool = _exam_pool(df, difficulty, code_type)
+    if pool is None:
+        return
+
+    rng = np.random.default_rng(seed)
+    codes = pool["codes"]
+    descs = pool["descs"]
+    total = len(codes)
+    templates = _CASE_TEMPLATES[lang]
+    sexes = _CASE_SEXES[lang]
+
+    remaining = int(n_questions)
+    while remaining > 0:
+        k = min(batch_size, remaining)
+        remaining -= k
+
+        correct = rng.integers(0, total, size=k)
+        wrong = _exam_distractors(rng, pool, correct)
+        # مكان الإجابة الصحيحة بين الخيارات الأربعة
+        answer_at = rng.integers(0, 4, size=k)
+
+        options = np.empty((k, 4), dtype=np.int64)
+        slot = np.arange(4).reshape(1, 4)
+        wrong_slot = slot - (slot > answer_at.reshape(k, 1))
+        wrong_slot = np.minimum(wrong_slot, 2)
+        options[:] = np.take_along_axis(wrong, wrong_slot, axis=1)
+        options[np.arange(k), answer_at] = correct
+        option_codes = codes[options].tolist()
+        answer_codes = codes[correct].tolist()
+        answer_descs = descs[correct].tolist()
+
+        if case:
+            ages = _CASE_AGES[rng.integers(0, len(_CASE_AGES), size=k)].tolist()
+            sex_list = sexes[rng.integers(0, len(sexes), size=k)].tolist()
+            tpl_idx = rng.integers(0, len(templates), size=k).tolist()
+            yield [
+                {
+                    "prompt": templates[t].format(age=age, sex=sex, desc=desc),
+                    "options": opts,
+                    "answer": ans,
+                    "difficulty": difficulty,
+                    "case": True,
+                }
+                for t, age, sex, desc, opts, ans in zip(
+                    tpl_idx, ages, sex_list, answer_descs, option_codes, answer_codes
+                )
+            ]
+        else:
+            yield [
+                {
+                    "prompt": _prompt_text(desc, lang),
+                    "options": opts,
+                    "answer": ans,
+                    "difficulty": difficulty,
+                }
+                for desc, opts, ans in zip(answer_descs, option_codes, answer_codes)
+            ]
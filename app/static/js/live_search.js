@@ -0,0 +1,107 @@
+// app/static/js/live_search.js
+// Search-as-you-type over one WebSocket per page (/ws/search).
+// The server debounces and drops stale queries; we also ignore any reply
+// whose seq is older than the last query sent. Falls back to fetch()
+// against /search/{kind} when WebSockets are unavailable, and for good
+// after MAX_FAILS connects in a row never open (proxy without upgrade...).
+(function () {
+  function LiveSearch(kind, onResults, opts) {
+    const limit = (opts && opts.limit) || 10;
+    const MAX_FAILS = 3;
+    const CONNECT_TIMEOUT = 3000;
+    let ws = null;
+    let seq = 0;
+    let pending = null;  // last message not yet sent (socket still connecting)
+    let inflight = null; // last message sent and not answered yet
+    let fails = 0;       // connects in a row that never opened
+    let retry = 0;
+    let timer = null;
+
+    function connect() {
+      if (!("WebSocket" in window)) return;
+      const proto = location.protocol === "https:" ? "wss" : "ws";
+      const sock = new WebSocket(`${proto}://${location.host}/ws/search`);
+      let opened = false;
+      ws = sock;
+
+      // a hanging upgrade would keep queries in `pending` forever
+      const giveUp = setTimeout(() => { if (!opened) sock.close(); }, CONNECT_TIMEOUT);
+
+      sock.onopen = () => {
+        opened = true;
+        clearTimeout(giveUp);
+        fails = 0;
+        retry = 0;
+        if (pending) {
+          sock.send(JSON.stringify(pending));
+          inflight = pending;
+        }
+        pending = null;
+      };
+      sock.onmessage = (e) => {
+        let data;
+        try { data = JSON.parse(e.data); } catch (_) { return; }
+        if (inflight && data.seq === inflight.seq) inflight = null;
+        if (data.seq !== seq) return; // stale
+        onResults(data.error ? null : (data.results || []), data);
+      };
+      sock.onclose = () => {
+        clearTimeout(giveUp);
+        if (ws === sock) ws = null;
+        // the newest query would otherwise never get an answer
+        const lost = pending || inflight;
+        pending = null;
+        inflight = null;
+        if (lost && lost.seq === seq) viaFetch(lost.q, lost.seq);
+
+        if (!opened) fails += 1;
+        if (fails >= MAX_FAILS) return; // fetch only from now on
+        // reconnect with backoff; plain fetch is used meanwhile
+        retry = Math.min(retry + 1, 5);
+        setTimeout(connect, 500 * retry);
+      };
+    }
+
+    async function viaFetch(q, mySeq) {
+      try {
+        const res = await fetch(`/search/${encodeURIComponent(kind)}?q=${encodeURIComponent(q)}&limit=${limit}`);
+        const data = await res.json();
+        if (mySeq === seq) onResults(res.ok ? (data.results || []) : null, data);
+      } catch (_) {
+        if (mySeq === seq) onResults(null, {});
+      }
+    }
+
+    function search(q) {
+      seq += 1;
+      const msg = { kind, q, limit, seq };
+      if (ws && ws.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify(msg));
+        inflight = msg;
+        return;
+      }
+      if (ws && ws.readyState === WebSocket.CONNECTING) {
+        pending = msg;
+        return;
+      }
+      // no socket: debounce locally like before
+      clearTimeout(timer);
+      const mySeq = seq;
+      timer = setTimeout(() => viaFetch(q, mySeq), 250);
+    }
+
+    // drop whatever is in flight (e.g. the box was cleared)
+    function cancel() {
+      seq += 1;
+      pending = null;
+      inflight = null;
+      clearTimeout(timer);
+    }
+
+    connect();
+    return { search, cancel };
+  }
+
+  window.Tarmeez = window.Tarmeez || {};
+  window.Tarmeez.LiveSearch = LiveSearch;
+})();
@@ -13,6 +13,15 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   let questions = [];
   let answers = {}; // i -> chosen option index
+  let saved = false; // attempt already sent for this set of questions
+
+  // anonymous id so the server can keep this browser's quiz history
+  const USER_KEY = "tarmeez_user";
+  let USER_ID = localStorage.getItem(USER_KEY);
+  if (!USER_ID) {
+    USER_ID = (window.crypto?.randomUUID?.() || `u${Date.now()}${Math.random().toString(16).slice(2)}`);
+    localStorage.setItem(USER_KEY, USER_ID);
+  }
 
   const esc = (s) =>
     String(s ?? "").replace(/[&<>"']/g, (c) => ({
@@ -81,10 +90,11 @@ document.addEventListener("DOMContentLoaded", async () => {
   async function loadQuiz() {
     resultBox.textContent = "";
     answers = {};
+    saved = false;
     root.innerHTML = `<div class="muted">Loading questions...</div>`;
 
     // IMPORTANT: your API is /quiz/{kind}?n=...
-const url = `/api/quiz/${encodeURIComponent(KIND)}?n=${encodeURIComponent(N)}`;
+    const url = `/api/quiz/${encodeURIComponent(KIND)}?n=${encodeURIComponent(N)}&user_id=${encodeURIComponent(USER_ID)}`;
     const res = await fetch(url);
 
     if (!res.ok) {
@@ -144,6 +154,8 @@ const url = `/api/quiz/${encodeURIComponent(KIND)}?n=${encodeURIComponent(N)}`;
       }
     });
 
+    saveAttempt();
+
     const score = Math.round((correct / questions.length) * 100);
     resultBox.innerHTML = `
       <div class="score">
@@ -153,6 +165,21 @@ const url = `/api/quiz/${encodeURIComponent(KIND)}?n=${encodeURIComponent(N)}`;
     `;
   }
 
+  // send answered questions; the server queues them, so don't wait on it
+  function saveAttempt() {
+    const list = questions
+      .map((q, i) => (answers[i] === undefined ? null : { code: q.answer, chosen: q.options[answers[i]] }))
+      .filter(Boolean);
+    if (saved || !list.length) return;
+    saved = true;
+
+    fetch("/api/attempts", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ user_id: USER_ID, kind: KIND, answers: list }),
+    }).catch(() => {});
+  }
+
   submitBtn?.addEventListener("click", grade);
 
   reloadBtn?.addEventListener("click", () => {
@@ -0,0 +1,173 @@
+# app/versions.py
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.search import build_fragments, free_search_json
+
+
+CURRENT = "current"
+
+
+class StringPool:
+    """
+    Interns strings so the same description text is one object in memory,
+    whichever version (or the base) it came from.
+    """
+
+    def __init__(self) -> None:
+        self._pool: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._pool)
+
+    def get(self, s: str) -> str:
+        return self._pool.setdefault(s, s)
+
+    def column(self, values: pd.Series) -> pd.Series:
+        return pd.Series([self.get(v) for v in values.astype(str).tolist()], index=values.index, dtype=object)
+
+
+def _desc_by_code(df: pd.DataFrame) -> pd.Series:
+    first = df.drop_duplicates(subset=["code"], keep="first")
+    return pd.Series(first["description"].tolist(), index=pd.Index(first["code"].astype(str).tolist()), dtype=object)
+
+
+class VersionedCodeSet:
+    """
+    One code set (CPT or ICD) with several yearly releases.
+
+    The base frame is the current file. Every other version is kept only as a
+    delta against it:
+      - added:   codes that are not in the base
+      - deleted: base codes missing from the version
+      - changed: codes whose description differs
+    Delta rows live in a small frame (added + changed); base rows that a
+    version deletes or replaces are hidden by index label at search time.
+    Memory therefore grows with the size of the changes, not with the
+    number of versions.
+    """
+
+    def __init__(self, base: pd.DataFrame, kind: str) -> None:
+        self.kind = kind
+        self.pool = StringPool()
+        # the base frame is shared with the rest of the app (not copied);
+        # its text columns are swapped for pooled strings in place
+        self.base = base
+        for col in ("description", "keywords"):
+            if col in self.base.columns:
+                self.base[col] = self.pool.column(self.base[col])
+        self._base_desc = _desc_by_code(self.base)
+        self.fragments = build_fragments(self.base, kind)
+        self.deltas: Dict[str, Dict[str, Any]] = {}
+
+    # ---- building ----
+    def add_version(self, version: str, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Diff `df` (a full release) against the base and keep only the delta.
+        """
+        ver = df.drop_duplicates(subset=["code"], keep="first")
+        ver = ver.set_axis(pd.Index(ver["code"].astype(str).tolist()), axis=0)
+        base = self._base_desc
+
+        added_codes = ver.index.difference(base.index)
+        deleted_codes = base.index.difference(ver.index)
+        common = ver.index.intersection(base.index)
+        diff = ver.loc[common, "description"].astype(str).values != base.loc[common].astype(str).values
+        changed_codes = common[diff]
+
+        rows = ver.loc[added_codes.append(changed_codes)].reset_index(drop=True)
+        for col in self.base.columns:
+            if col not in rows.columns:
+                rows[col] = ""
+        rows = rows[list(self.base.columns)]
+        for col in ("code", "description", "keywords"):
+            if col in rows.columns:
+                rows[col] = self.pool.column(rows[col])
+
+        hidden = set(deleted_codes.tolist()) | set(changed_codes.tolist())
+        self.deltas[version] = {
+            "added": set(added_codes.tolist()),
+            "deleted": set(deleted_codes.tolist()),
+            "changed": set(changed_codes.tolist()),
+            # per-version indexes
+            "rows": rows,
+            "fragments": build_fragments(rows, self.kind),
+            "by_code": dict(zip(rows["code"].tolist(), range(len(rows)))),
+            "hidden_labels": self.base.index[self.base["code"].isin(hidden)],
+        }
+        return self.summary()[version]
+
+    # ---- queries ----
+    def versions(self) -> List[str]:
+        return [CURRENT] + list(self.deltas)
+
+    def has(self, version: Optional[str]) -> bool:
+        return not version or version == CURRENT or version in self.deltas
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        return {
+            v: {"added": len(d["added"]), "deleted": len(d["deleted"]), "changed": len(d["changed"])}
+            for v, d in self.deltas.items()
+        }
+
+    def lookup(self, code: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        O(1) code lookup in a given version (None/"current" -> base).
+        """
+        code = (code or "").strip()
+        if version and version != CURRENT:
+            d = self.deltas[version]
+            if code in d["deleted"]:
+                return None
+            pos = d["by_code"].get(code)
+            if pos is not None:
+                row = d["rows"].iloc[pos]
+                status = "added" if code in d["added"] else "changed"
+                return {"code": code, "description": row["description"], "version": version, "status": status}
+        desc = self._base_desc.get(code)
+        if desc is None:
+            return None
+        return {
+            "code": code,
+            "description": desc,
+            "version": version or CURRENT,
+            "status": "unchanged" if version and version != CURRENT else "current",
+        }
+
+    def search_json(self, q: str, limit: int = 20, version: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Version-aware free search: base minus hidden rows, plus the delta rows,
+        merged by score. Returns (score, encoded JSON object) pairs built from
+        the precomputed fragments.
+        """
+        if not version or version == CURRENT:
+            return free_search_json(self.base, q, limit=limit, kind=self.kind, fragments=self.fragments)
+
+        d = self.deltas[version]
+        hits = free_search_json(self.base, q, limit=limit, kind=self.kind,
+                                exclude=d["hidden_labels"], fragments=self.fragments)
+        if len(d["rows"]):
+            hits = hits + free_search_json(d["rows"], q, limit=limit, kind=self.kind, fragments=d["fragments"])
+            hits.sort(key=lambda r: r[0], reverse=True)
+        return hits[:limit]
+
+
+def build_versioned(base: Optional[pd.DataFrame], kind: str, files: Dict[str, Any],
+                    loader: Callable[[Any], pd.DataFrame]) -> Optional[VersionedCodeSet]:
+    """
+    Load each versioned file once, keep only its delta and drop the full frame.
+    """
+    if base is None:
+        return None
+    vcs = VersionedCodeSet(base, kind)
+    for version, path in files.items():
+        try:
+            stats = vcs.add_version(version, loader(path))
+        except Exception as e:
+            print(f"[{kind.upper()}] version {version} load failed:", e)
+            continue
+        print(f"[{kind.upper()}] version {version}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return vcs
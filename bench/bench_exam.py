@@ -0,0 +1,55 @@
+# bench/bench_exam.py
+"""
+Throughput benchmark for bulk exam generation (questions/sec).
+
+Run from the repo root:
+    python -m bench.bench_exam [--n 2000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.load_data import load_cpt
+from app.smart_gen import generate_case_mcq, generate_exam, generate_smart_mcq
+
+
+def _rate(fn, n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return n / best if best > 0 else float("inf")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--legacy-n", type=int, default=50, help="questions for the per-question baseline")
+    args = ap.parse_args()
+
+    df = load_cpt()
+    print(f"{'mode':<6} {'lang':<4} {'difficulty':<10} {'bulk q/s':>12} {'legacy q/s':>12}")
+
+    for case in (False, True):
+        legacy = generate_case_mcq if case else generate_smart_mcq
+        for lang in ("en", "ar"):
+            for difficulty in ("easy", "medium", "hard"):
+                bulk = _rate(
+                    lambda: [q for b in generate_exam(df, args.n, lang, difficulty, "cpt", case=case) for q in b],
+                    args.n,
+                    args.repeat,
+                )
+                old = _rate(
+                    lambda: legacy(df, args.legacy_n, lang, difficulty, "cpt"),
+                    args.legacy_n,
+                    1,
+                )
+                mode = "case" if case else "smart"
+                print(f"{mode:<6} {lang:<4} {difficulty:<10} {bulk:>12,.0f} {old:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench/bench_serialize.py
+"""
+Response serialization benchmark for search results (scoring excluded).
+
+Compares, for 10 / 100 / 1000 results:
+  - std:   build result dicts, FastAPI jsonable_encoder + starlette JSONResponse
+  - frags: join precomputed per-record JSON fragments (what /search/* does now)
+
+Run from the repo root:
+    python -m bench.bench_serialize [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.load_data import load_cpt
+from app.search import _meta_columns, _text, _top, build_fragments, join_json, render_fragments
+
+
+def _std(df, kind, q, pos, scores) -> bytes:
+    picked = df.iloc[pos]
+    metas = [{} for _ in range(len(picked))]
+    for col in _meta_columns(df, kind):
+        for m, v in zip(metas, _text(picked, col).tolist()):
+            m[col] = v
+    results = [
+        {"code": c, "description": d, "score": int(s), "meta": m}
+        for c, d, s, m in zip(_text(picked, "code").tolist(), _text(picked, "description").tolist(), scores, metas)
+    ]
+    return JSONResponse(jsonable_encoder({"query": q, "results": results})).body
+
+
+def _frags(fragments, q, pos, scores) -> bytes:
+    body = '{"query":' + json.dumps(q) + ',"results":' + join_json(render_fragments(fragments, pos, scores)) + "}"
+    return body.encode("utf-8")
+
+
+def _best_us(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--query", default="a", help="a query with at least 1000 matches")
+    args = ap.parse_args()
+
+    df = load_cpt()
+    t0 = time.perf_counter()
+    fragments = build_fragments(df, "cpt")
+    print(f"build_fragments: {len(df)} rows in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    print(f"{'results':>8} {'std us':>10} {'frags us':>10} {'speedup':>8}")
+
+    for n in (10, 100, 1000):
+        pos, scores = _top(df, args.query, n, None)
+        assert json.loads(_std(df, "cpt", args.query, pos, scores)) == json.loads(
+            _frags(fragments, args.query, pos, scores)
+        )
+        std = _best_us(lambda: _std(df, "cpt", args.query, pos, scores), args.repeat)
+        fast = _best_us(lambda: _frags(fragments, args.query, pos, scores), args.repeat)
+        print(f"{len(pos):>8} {std:>10.1f} {fast:>10.1f} {std / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
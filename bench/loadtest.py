@@ -0,0 +1,230 @@
+# bench/loadtest.py
+"""
+Local load test: start the app under uvicorn or gunicorn with N workers,
+replay a weighted mix of search / quiz / page requests and report
+throughput and p50/p95/p99 latency per endpoint as JSON.
+
+Examples (from the repo root):
+    python -m bench.loadtest --workers 1 --workers 4 --duration 20
+    python -m bench.loadtest --server gunicorn --workers 2 --out results.json --label main
+    python -m bench.loadtest --url http://127.0.0.1:8000   # already running server
+    python -m bench.loadtest --workers 2 --env TARMEEZ_SOMETHING=1   # extra env for the server
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# ---- Traffic mix ----
+# skewed like real traffic: a few popular queries, a long tail of others
+CPT_QUERIES = ["99213", "99214", "office visit", "biopsy", "x-ray", "anesthesia", "99203",
+               "injection", "colonoscopy", "ultrasound", "mri", "removal", "repair", "ekg"]
+ICD_QUERIES = ["diabetes", "hypertension", "E11.9", "I10", "asthma", "pneumonia", "fracture",
+               "depression", "anemia", "J45", "pregnancy", "obesity", "migraine", "Z00.00"]
+
+# (endpoint name, weight, path builder)
+MIX = [
+    ("/search/cpt", 35, lambda r: f"/search/cpt?q={quote(_skewed(r, CPT_QUERIES))}&limit=10"),
+    ("/search/icd", 35, lambda r: f"/search/icd?q={quote(_skewed(r, ICD_QUERIES))}&limit=10"),
+    ("/api/quiz/{kind}", 15, lambda r: f"/api/quiz/{r.choice(['cpt', 'icd'])}?n=10"),
+    ("pages", 15, lambda r: r.choice(["/", "/cpt", "/icd10", "/quiz", "/quiz/run/cpt?n=10&ui_lang=en"])),
+]
+
+
+def _skewed(r: random.Random, items: List[str]) -> str:
+    # roughly Zipf: early items are picked much more often
+    i = min(int(r.paretovariate(1.2)) - 1, len(items) - 1)
+    return items[i]
+
+
+def _percentile(sorted_ms: List[float], p: float) -> Optional[float]:
+    if not sorted_ms:
+        return None
+    k = max(0, min(len(sorted_ms) - 1, int(round(p / 100.0 * (len(sorted_ms) - 1)))))
+    return round(sorted_ms[k], 3)
+
+
+# ---- Server process ----
+def _start_server(server: str, workers: int, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    if server == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "app.api:app",
+               "-k", "uvicorn.workers.UvicornWorker", "-w", str(workers),
+               "-b", f"127.0.0.1:{port}", "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app.api:app",
+               "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=str(BASE_DIR), env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_ready(host: str, port: int, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/status")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server on {host}:{port} did not become ready in {timeout:.0f}s")
+
+
+def _stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# ---- Load generator ----
+def _client(host: str, port: int, stop_at: float, seed: int,
+            out: List[Tuple[str, float, bool]]) -> None:
+    r = random.Random(seed)
+    names = [m[0] for m in MIX]
+    weights = [m[1] for m in MIX]
+    builders = {m[0]: m[2] for m in MIX}
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    while time.monotonic() < stop_at:
+        name = r.choices(names, weights)[0]
+        path = builders[name](r)
+        t0 = time.perf_counter()
+        ok = False
+        # one retry on a fresh connection: the server may drop an idle keep-alive socket
+        for _attempt in range(2):
+            try:
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status < 500
+                break
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+        out.append((name, (time.perf_counter() - t0) * 1000.0, ok))
+
+    conn.close()
+
+
+def run_load(host: str, port: int, duration: float, concurrency: int,
+             warmup: float, seed: int) -> Dict[str, object]:
+    if warmup > 0:
+        _client(host, port, time.monotonic() + warmup, seed - 1, [])
+
+    results: List[List[Tuple[str, float, bool]]] = [[] for _ in range(concurrency)]
+    stop_at = time.monotonic() + duration
+    threads = [threading.Thread(target=_client, args=(host, port, stop_at, seed + i, results[i]))
+               for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    by_name: Dict[str, List[Tuple[float, bool]]] = {}
+    for chunk in results:
+        for name, ms, ok in chunk:
+            by_name.setdefault(name, []).append((ms, ok))
+
+    def summary(rows: List[Tuple[float, bool]]) -> Dict[str, object]:
+        lat = sorted(ms for ms, _ in rows)
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, ok in rows if not ok),
+            "rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _percentile(lat, 50),
+            "p95_ms": _percentile(lat, 95),
+            "p99_ms": _percentile(lat, 99),
+        }
+
+    all_rows = [row for rows in by_name.values() for row in rows]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": summary(all_rows),
+        "endpoints": {name: summary(rows) for name, rows in sorted(by_name.items())},
+    }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(BASE_DIR),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    ap.add_argument("--workers", type=int, action="append",
+                    help="worker count; repeat to compare several (default: 1)")
+    ap.add_argument("--url", help="test an already running server instead of starting one")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per run")
+    ap.add_argument("--warmup", type=float, default=2.0, help="seconds of untimed traffic first")
+    ap.add_argument("--concurrency", type=int, default=16, help="parallel client connections")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                    help="extra environment for the server (e.g. cache settings)")
+    ap.add_argument("--label", default="", help="free text stored with the results")
+    ap.add_argument("--out", help="write JSON here (default: stdout)")
+    args = ap.parse_args()
+
+    env = dict(kv.split("=", 1) for kv in args.env)
+    runs = []
+
+    if args.url:
+        u = urlsplit(args.url)
+        host, port = u.hostname or "127.0.0.1", u.port or 80
+        res = run_load(host, port, args.duration, args.concurrency, args.warmup, args.seed)
+        runs.append({"server": "external", "url": args.url, "workers": None, **res})
+    else:
+        for workers in args.workers or [1]:
+            proc = _start_server(args.server, workers, args.port, env)
+            try:
+                _wait_ready("127.0.0.1", args.port)
+                res = run_load("127.0.0.1", args.port, args.duration, args.concurrency,
+                               args.warmup, args.seed)
+            finally:
+                _stop_server(proc)
+            runs.append({"server": args.server, "workers": workers, **res})
+            print(f"[loadtest] {args.server} workers={workers}: "
+                  f"{res['total']['rps']} req/s, p95={res['total']['p95_ms']} ms", file=sys.stderr)
+
+    report = {
+        "label": args.label,
+        "git_rev": _git_rev(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "env": env,
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()